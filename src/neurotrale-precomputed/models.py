@@ -1,8 +1,9 @@
 
 from uuid import UUID
-from pydantic import BaseModel, RootModel
+from pydantic import BaseModel, Field, RootModel, TypeAdapter
 from typing import (
-    Deque, Dict, FrozenSet, List, Literal, Optional, Sequence, Set, Tuple, Union
+    Annotated, Deque, Dict, FrozenSet, List, Literal, Optional, Sequence,
+    Set, Tuple, Union
 )
 
 
@@ -36,3 +37,14 @@ class FiberAnnotation(BaseAnnotation):
    anntype: Literal['axon']
    points: List[Tuple[int,int,int]]
    length: float
+
+
+# Discriminated union over the annotation 'type' tag.  The discriminator
+# lets pydantic dispatch straight to the matching model instead of trying
+# each member of the union in turn for every element:
+Annotation = Annotated[Union[CentroidAnnotation,CellAnnotation,
+                             FiberAnnotation],
+                       Field(discriminator='type')]
+
+# Validates a whole annotation file in a single pass:
+AnnotationList = TypeAdapter(List[Annotation])
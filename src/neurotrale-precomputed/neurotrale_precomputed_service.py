@@ -29,15 +29,26 @@
 # - It is important for the server to accept URLs without '/' that end up
 #   being directories, and provide the path _from_ the client's request path.
 
+import collections
 import csv
-import json
+import functools
 import logging
+import threading
+
+import aiofiles
 import os
+import pathlib
+import re
+import stat
+import time
 from typing import Optional, Union
 from fastapi import FastAPI, APIRouter, Request, Cookie, Header, HTTPException
-from fastapi.responses import HTMLResponse, FileResponse, Response, JSONResponse
+from fastapi.responses import HTMLResponse, FileResponse, Response, \
+                              JSONResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
+import numpy
+import orjson
 import tifffile
 
 import models
@@ -47,6 +58,14 @@ router = APIRouter(
    # tags = [""]
 )
 
+# All four verbs on JSON annotation files share one path shape.  Group
+# them under a single sub-router so the matcher evaluates the common
+# "/{dataset_path}/annotations/{block}" prefix once instead of walking
+# a separate full-path regex for every route:
+annotation_router = APIRouter(
+   prefix = "/{dataset_path}/annotations/{block}"
+)
+
 # Fastapi dev notes:
 #
 # Optional query params:  http://127.0.0.1:8000/items/5?q=somequery
@@ -66,6 +85,10 @@ class Config:
    # mapped volume.
    root_path = os.getenv("PRECOMPUTED_PATH", "/data")
    logfile = os.getenv("PRECOMPUTED_LOGGING", None)
+   # Debug aid: when set, annotation GETs validate the file against the
+   # annotation schema before serving it.  Off by default so the hot
+   # path serves raw bytes without a parse:
+   validate = os.getenv("PRECOMPUTED_VALIDATE", None)
    # Option for CORS middleware:
    origins = [ "*" ]
 
@@ -89,6 +112,94 @@ else:
       logging.warning("Logging to stdout due to: %s" % str(e))
 
 
+# Matches the "xNNNyMMMzPPP" point-path encoding in one scan:
+_PT_RE = re.compile(r'^x(-?\d+)y(-?\d+)z(-?\d+)$')
+
+
+def _resolve_safe(req_path:str)->str:
+   '''
+   Join a client-supplied path onto the dataset root and normalize it,
+   guaranteeing the result stays inside Config.root_path.  This replaces
+   the ad-hoc string concatenation, trailing-slash stripping and '..'
+   scanning that each handler used to do on its own.  Symlinks are not
+   resolved, so datasets living behind links under the root keep
+   working.
+   Args:
+      req_path (str): The path from the client's request, relative to
+                      the dataset root.
+   Returns:
+      str: Normalized absolute filesystem path.
+   Raises:
+      HTTPException: If the path would escape the dataset root.
+   '''
+   full = pathlib.Path(os.path.normpath( \
+             os.path.join(Config.root_path, req_path.lstrip('/'))))
+   if not full.is_relative_to(Config.root_path):
+      # Directory traversal attack:
+      logging.warning("Directory traversal attack detected: %s.  Raising 404." \
+                      % req_path)
+      raise HTTPException(status_code=404, detail="%s not found" % req_path)
+   return str(full)
+
+
+def _etag(mtime_ns:int, size:int)->str:
+   '''
+   Build a (weak-by-construction, strong-by-format) ETag value from a
+   file's modification time and size.  Cheap to compute and stable
+   until the file changes, which is what tile viewers need for
+   conditional GETs.
+   Args:
+      mtime_ns (int): Modification time (ns) of the file.
+      size (int): Size of the file in bytes.
+   Returns:
+      str: Quoted entity-tag value.
+   '''
+   return '"%x-%x"' % (mtime_ns, size)
+
+
+# Memoized os.stat() results: path -> (expiry, value).  Entries live
+# for a short TTL only.  The service runs with multiple uvicorn
+# workers and datasets are placed on disk by outside processes, so a
+# cache entry in one worker cannot be invalidated by another; the TTL
+# keeps every worker coherent within a second:
+_STAT_TTL_SECONDS = 1.0
+_stat_cache = {}
+
+
+def _stat(path:str)->(bool,bool,int,int,os.stat_result):
+   '''
+   Memoized os.stat().  The read endpoints previously stat'd each path
+   two or three times per request (os.path.exists, os.path.isdir, then
+   FileResponse), which is expensive on network filesystems.  Results
+   are kept for a short TTL, so hot paths skip the syscall while
+   changes made by other workers or by outside dataset ingest are
+   picked up within a second.  Misses are never cached, since a file
+   can appear on disk at any moment.
+   Args:
+      path (str): Absolute filesystem path.
+   Returns:
+      (bool,bool,int,int,os.stat_result): exists, is_dir, size, mtime
+                           (ns), and the raw stat result (handy for
+                           FileResponse).  A path that does not exist
+                           returns False,False,0,0,None.
+   '''
+   now = time.monotonic()
+   cached = _stat_cache.get(path)
+   if cached is not None and cached[0] > now:
+      return cached[1]
+   try:
+      st = os.stat(path)
+   except OSError:
+      _stat_cache.pop(path, None)
+      return False, False, 0, 0, None
+   val = (True, stat.S_ISDIR(st.st_mode), st.st_size, st.st_mtime_ns, st)
+   if len(_stat_cache) >= 8192:
+      # Crude bound; fine because every entry expires within the TTL:
+      _stat_cache.clear()
+   _stat_cache[path] = (now + _STAT_TTL_SECONDS, val)
+   return val
+
+
 class Tools:
    '''
    Tools used to satisfy our implementation of Precomputed Service requirements.
@@ -111,9 +222,7 @@ class Tools:
       '''
       logging.debug("Tools: html_dir_listing(): client_url_path=%s" % client_url_path)
       # Work on the filesystem path:
-      full_fs_path = Config.root_path + client_url_path
-      while full_fs_path.endswith('/'):
-         full_fs_path = full_fs_path[:-1]
+      full_fs_path = _resolve_safe(client_url_path)
       logging.debug("Tools: html_dir_listing(): full_fs_path=%s" % full_fs_path)
       # Now work on return path parent URL:
       relative_parent = ""
@@ -124,54 +233,94 @@ class Tools:
             relative_parent = relative_parent.split('/')[-1]
          relative_parent = relative_parent + "/"
       # Check filesystem path existence:
-      if not os.path.exists(full_fs_path):
+      exists,is_dir,size,mtime_ns,st = _stat(full_fs_path)
+      if not exists:
          raise HTTPException(status_code=404, detail="%s not found" % \
                              relative_parent)
-      entries = os.listdir(full_fs_path)
-      entries.sort()
-      html_content = """
+      # The rendered listing only changes when the directory does, so
+      # it is memoized per (path, mtime):
+      return Tools._render_dir_listing(full_fs_path, client_url_path,
+                                       relative_parent, mtime_ns)
+
+
+   @functools.lru_cache(maxsize=1024)
+   def _render_dir_listing(full_fs_path:str, client_url_path:str,
+                           relative_parent:str, mtime_ns:int)->str:
+      '''
+      Memoized implementation of html_dir_listing().  The extra
+      mtime_ns argument only serves as part of the cache key, so a
+      changed directory is re-rendered.
+      Args:
+         full_fs_path (str): Absolute filesystem path of the directory.
+         client_url_path (str): Path as requested by the client.
+         relative_parent (str): Parent prefix for the entry URLs.
+         mtime_ns (int): Modification time (ns) of the directory.
+      Returns:
+         str: HTML-formatted directory listing.
+      '''
+      # os.scandir reports each entry's type from the directory read
+      # itself, so no extra stat syscall per entry is needed:
+      with os.scandir(full_fs_path) as scan:
+         entries = sorted(scan, key=lambda e: e.name)
+      # Build the listing in a list and join once at the end, rather
+      # than growing an immutable str entry by entry:
+      parts = ["""
       <html>
           <head>
               <title>Directory Listing</title>
           </head>
           <body>
              <h1>Directory Listing for %s:</h1>
-      \n""" % client_url_path
+      \n""" % client_url_path]
       for entry in entries:
-         hentry = relative_parent + entry
+         hentry = relative_parent + entry.name
          # Check to see if it's a file or a directory.  Directory entries
          # will end in '/':
-         if os.path.isdir(full_fs_path+'/'+entry):
+         if entry.is_dir():
             hentry = hentry + '/'
          logging.debug("Tools: Relative URL: %s" % hentry)
-         html_content += "               <a href=%s>%s</a><br>\n" % \
-                         (hentry,hentry)
-      html_content += """
+         parts.append("               <a href=%s>%s</a><br>\n" % \
+                      (hentry,hentry))
+      parts.append("""
           </body>
       </html>
-      """
-      return html_content
+      """)
+      return ''.join(parts)
 
 
-   def get_full_file_path(req_path:str)->FileResponse:
+   def get_full_file_path(req_path:str,
+                          request:Optional[Request]=None)->FileResponse:
       '''
       Resolve the absolute path and, if the path is valid, return the
       appropriate REST response (FileResponse) that will be returned
-      to the REST client.
+      to the REST client.  When the client presents a matching
+      If-None-Match header, a 304 is returned instead of the file.
       Args:
          req_path (str): Absolute path of the file requested.
+         request (Optional[Request]): The client's REST request, used
+                                      for conditional-GET headers.
       Returns:
          FileResponse: If the req_path refers to a file.
       Raises:
          HTTPException: If the req_path is not valid.
       '''
-      full_path = Config.root_path + "/" + req_path
+      full_path = _resolve_safe(req_path)
       logging.debug("Full req path: %s" % full_path)
-      while full_path.endswith('/'):
-         full_path = full_path[:-1]
-      if not os.path.exists(full_path):
+      # Annotation files are mutable (possibly from another worker),
+      # so derive the validator and the response headers from a fresh
+      # stat rather than the memoized one:
+      try:
+         st = os.stat(full_path)
+      except OSError:
          raise HTTPException(status_code=404, detail="%s not found" % req_path)
-      return FileResponse(path=full_path)
+      etag = _etag(st.st_mtime_ns, st.st_size)
+      if request is not None and \
+         request.headers.get('if-none-match') == etag:
+         return Response(status_code=304)
+      # Hand the fresh stat result over so FileResponse doesn't stat
+      # the file again before sending it:
+      return FileResponse(path=full_path, stat_result=st,
+                          headers={"ETag": etag})
 
 
    def get_block_size(info_file:str)->(int,int,int):
@@ -195,24 +344,29 @@ class Tools:
       '''
       val = None
       logging.debug("Get Block Size: info_file=%s" % info_file)
-      if not info_file in Tools.block_dict:
+      # Entries are validated against the file's mtime so a regenerated
+      # block_info.csv is re-read instead of served stale:
+      exists,is_dir,size,mtime_ns,st = _stat(info_file)
+      cached = Tools.block_dict.get(info_file)
+      if cached is not None and cached[0] == mtime_ns:
+         # Found current info in cache.  Return it.
+         val = cached[1]
+      else:
          # Try to load the info from the file into the cache:
          try:
             with open(info_file, 'r') as csvfile:
                csvreader = csv.reader(csvfile)
                row1 = next(csvreader)
                val = [int(row1[0]),int(row1[1]),int(row1[2])]
-               Tools.block_dict[info_file] = val
+               Tools.block_dict[info_file] = (mtime_ns, val)
          except Exception as e:
             logging.warning("Exception while getting block size: %s" % str(e))
             return None,None,None
-      else:
-         # Found info in cache.  Return it.
-         val = Tools.block_dict.get(info_file)
       logging.debug("Block size val=%s" % str(val))
       return val[0],val[1],val[2]
 
 
+   @functools.lru_cache(maxsize=65536)
    def get_point_from_path(point_dir:str)->(int,int,int):
       '''
       Given a string (directory name within a path), extract the coordinate
@@ -226,39 +380,14 @@ class Tools:
          (int,int,int): The x,y,z coordinates extracted from the string.
                         If the string is malformed, return None,None,None.
       '''
-      # Make sure point_dir has x...y...z...:
-      if point_dir[0] != 'x':
+      # A single pass of the compiled pattern validates the shape and
+      # captures all three coordinates at once:
+      m = _PT_RE.match(point_dir)
+      if m is None:
          logging.error("Parameter error in get_point_from_path(): path not point: %s" % point_dir)
          return None,None,None
-      ypos = point_dir.find('y')
-      # Handle legacy path:
-      if ypos == -1:
-         logging.error("Parameter error in get_point_from_path(): no 'y' in path: %s" % point_dir)
-         return None,None,None
-      zpos = point_dir.find('z')
-      if zpos == -1:
-         logging.error("Parameter error in get_point_from_path(): no 'z' in path: %s" % point_dir)
-         return None,None,None
-      xpoint = None
-      try:
-         xpoint = int(point_dir[1:ypos])
-      except Exception as e:
-         logging.error("Parameter error in get_point_from_path(): Invalid 'x': %s" % point_dir[1:ypos])
-         return None,None,None
-      ypoint = None
-      try:
-         ypoint = int(point_dir[ypos+1:zpos])
-      except Exception as e:
-         logging.error("Parameter error in get_point_from_path(): Invalid 'y': %s" % point_dir[ypos+1:zpos])
-         return None,None,None
-      zpoint = None
-      try:
-         zpoint = int(point_dir[zpos+1:])
-      except Exception as e:
-         logging.error("Parameter error in get_point_from_path(): Invalid 'z': %s" % point_dir[zpos+1:])
-         return None,None,None
       # Looks like a valid xyz point path:
-      return xpoint,ypoint,zpoint
+      return int(m[1]),int(m[2]),int(m[3])
 
 
    def translate_block_path(block_info_file:str, block:str)->str:
@@ -279,7 +408,28 @@ class Tools:
               The format is "xNNNN_yMMMM" where NNNN and MMMM are
               integers.
       '''
-      full_block_info_file = Config.root_path + "/" + block_info_file
+      full_block_info_file = _resolve_safe(block_info_file)
+      # The translation is deterministic for a given block_info.csv, so
+      # memoize it.  The file's mtime is part of the cache key, which
+      # invalidates entries if the dataset is regenerated:
+      exists,is_dir,size,mtime_ns,st = _stat(full_block_info_file)
+      return Tools._translate_block_path(full_block_info_file, block,
+                                         mtime_ns)
+
+
+   @functools.lru_cache(maxsize=65536)
+   def _translate_block_path(full_block_info_file:str, block:str,
+                             mtime_ns:int)->str:
+      '''
+      Memoized implementation of translate_block_path().  The extra
+      mtime_ns argument only serves as part of the cache key.
+      Args:
+         full_block_info_file (str): Absolute path to block_info.csv.
+         block (str): The point of interest, encoded as "xNNNyMMMzPPP".
+         mtime_ns (int): Modification time (ns) of block_info.csv.
+      Returns:
+         str: The block directory where the given point resides.
+      '''
       sizex,sizey,sizez = Tools.get_block_size(full_block_info_file)
       logging.debug("Block size = %s,%s,%s" % (str(sizex),str(sizey),str(sizez)))
       if sizex is None or sizey is None or sizez is None:
@@ -318,22 +468,192 @@ async def read_index(request: Request)->HTMLResponse:
    return HTMLResponse(content=html_content, status_code=200)
 
 
-def tiff_to_byte_stream(req_path:str)->Response:
+class _TiffCache:
+   '''
+   Bounded LRU of open tifffile.TiffFile handles.  Opening a TIFF cold
+   pays tag parsing and directory reads on every request; keeping the
+   handle open skips that for repeat requests, which adds up for
+   multi-page/pyramidal files.  Entries are keyed by path and validated
+   against mtime so a regenerated file gets reopened.  Each entry
+   carries its own lock because a TiffFile seeks its underlying file
+   and is not safe for concurrent reads.
+   '''
+
+   def __init__(self, maxsize:int=256):
+      self._maxsize = maxsize
+      self._entries = collections.OrderedDict()
+      self._lock = threading.Lock()
+
+   def get(self, path:str, mtime_ns:int)->(tifffile.TiffFile,threading.Lock):
+      '''
+      Return an open (TiffFile, lock) pair for the given path, opening
+      and caching the file if needed.  Callers must hold the returned
+      lock while reading from the handle.
+      Args:
+         path (str): Absolute filesystem path of the TIFF file.
+         mtime_ns (int): Modification time (ns) of the file.
+      Returns:
+         (tifffile.TiffFile,threading.Lock): Shared handle and its lock.
+      '''
+      with self._lock:
+         entry = self._entries.get(path)
+         if entry is not None:
+            if entry[0] == mtime_ns:
+               self._entries.move_to_end(path)
+               return entry[1],entry[2]
+            # File was regenerated; close the stale handle:
+            entry[1].close()
+            del self._entries[path]
+      tf = tifffile.TiffFile(path)
+      with self._lock:
+         entry = self._entries.get(path)
+         if entry is not None and entry[0] == mtime_ns:
+            # Another request opened the file first; keep theirs:
+            tf.close()
+         else:
+            entry = (mtime_ns, tf, threading.Lock())
+            self._entries[path] = entry
+            while len(self._entries) > self._maxsize:
+               evicted = self._entries.popitem(last=False)
+               evicted[1][1].close()
+         return entry[1],entry[2]
+
+
+_TIFF_CACHE = _TiffCache()
+
+# Pages larger than this decode into a temporary file-backed memmap
+# instead of a fresh heap allocation, capping resident memory:
+_LARGE_TIFF_NBYTES = 4_000_000
+
+
+class _ByteLRUCache:
+   '''
+   LRU cache for decoded tile bytes, bounded by total payload size
+   rather than entry count.  Tile sizes vary by orders of magnitude
+   between resolution levels, so an entry-count bound gives no real
+   memory guarantee; a byte budget does.  Values larger than the
+   budget are never cached, so a single oversized tile cannot pin the
+   whole budget, and its decode cost is paid per request instead.
+   '''
+
+   def __init__(self, max_nbytes:int=64_000_000):
+      self._max_nbytes = max_nbytes
+      self._nbytes = 0
+      self._entries = collections.OrderedDict()
+      self._lock = threading.Lock()
+
+   def get(self, key)->Optional[bytes]:
+      '''
+      Return the cached bytes for 'key', or None on a miss.
+      Args:
+         key: Hashable cache key.
+      Returns:
+         Optional[bytes]: The cached payload, or None.
+      '''
+      with self._lock:
+         data = self._entries.get(key)
+         if data is not None:
+            self._entries.move_to_end(key)
+         return data
+
+   def put(self, key, data:bytes):
+      '''
+      Insert 'data' under 'key', evicting least-recently-used entries
+      until the total cached payload fits the byte budget.
+      Args:
+         key: Hashable cache key.
+         data (bytes): Payload to cache.
+      '''
+      if len(data) > self._max_nbytes:
+         return
+      with self._lock:
+         old = self._entries.pop(key, None)
+         if old is not None:
+            self._nbytes -= len(old)
+         self._entries[key] = data
+         self._nbytes += len(data)
+         while self._nbytes > self._max_nbytes:
+            _,evicted = self._entries.popitem(last=False)
+            self._nbytes -= len(evicted)
+
+
+_TIFF_DATA_CACHE = _ByteLRUCache()
+
+
+def _read_tiff(full_path:str, mtime_ns:int)->bytes:
+   '''
+   Decode a TIFF file into its raw, C-contiguous byte representation.
+   Results are memoized per (path, mtime) in a byte-bounded LRU, so
+   repeat requests for the same tile skip TIFF header parsing and
+   decoding entirely.  The mtime in the key invalidates an entry when
+   the file is regenerated.
+   Args:
+      full_path (str): Absolute filesystem path of the TIFF file.
+      mtime_ns (int): Modification time (ns) of the file.
+   Returns:
+      bytes: The raw image buffer in C order.
+   '''
+   data = _TIFF_DATA_CACHE.get((full_path, mtime_ns))
+   if data is not None:
+      return data
+   tf,tf_lock = _TIFF_CACHE.get(full_path, mtime_ns)
+   with tf_lock:
+      page = tf.pages[0]
+      if len(tf.pages) == 1 and page.is_memmappable:
+         # Uncompressed, contiguous, native byte order: the on-disk
+         # pixel data already is exactly the byte stream we serve, so
+         # read the raw range and skip the codec entirely:
+         fh = tf.filehandle
+         fh.seek(page.dataoffsets[0])
+         data = fh.read(page.nbytes)
+         _TIFF_DATA_CACHE.put((full_path, mtime_ns), data)
+         return data
+      # Compressed (or multi-page) data must be decoded.  Let large
+      # pages decode into an OS-backed memmap so peak heap usage stays
+      # at the single output copy:
+      out = 'memmap' if page.nbytes > _LARGE_TIFF_NBYTES else None
+      chunk = tf.asarray(out=out)
+   # tobytes() requires C order; only force a reordering copy when the
+   # decoder produced a non-contiguous view:
+   if not chunk.flags.c_contiguous:
+      chunk = numpy.ascontiguousarray(chunk)
+   data = chunk.tobytes()
+   _TIFF_DATA_CACHE.put((full_path, mtime_ns), data)
+   return data
+
+
+def tiff_to_byte_stream(req_path:str,
+                        request:Optional[Request]=None)->Response:
    '''
    Helper method that returns a TIFF file as a numpy array that NeuroTrale
-   can consume.
+   can consume.  Tile contents only change when the file on disk does,
+   so responses carry an ETag and a matching If-None-Match request is
+   answered with a 304 without touching the TIFF at all.
    Args:
       req_path (str): The path to a TIFF file.
+      request (Optional[Request]): The client's REST request, used for
+                                   conditional-GET headers.
    Returns:
       Response: The tiff file byte stream.
    Raises:
       HTTPException: If the TIFF file was not found.
    '''
    try:
-      chunk = tifffile.imread(Config.root_path + "/" + req_path)
-      data = chunk.tostring("C")
+      full_path = _resolve_safe(req_path)
+      st = os.stat(full_path)
+      etag = _etag(st.st_mtime_ns, st.st_size)
+      if request is not None and \
+         request.headers.get('if-none-match') == etag:
+         return Response(status_code=304)
+      data = _read_tiff(full_path, st.st_mtime_ns)
       response = Response(content=data)
       response.headers["Content-type"] = "application/octet-stream"
+      response.headers["ETag"] = etag
+      response.headers["Cache-Control"] = "public, max-age=3600"
+      # Tile data is packed binary; gzipping it burns CPU for almost no
+      # size win.  An explicit identity encoding makes GZipMiddleware
+      # leave the response alone:
+      response.headers["Content-Encoding"] = "identity"
       return response
    except Exception as e:
       logging.error("File not found: %s/%s" % (Config.root_path,req_path))
@@ -378,9 +698,8 @@ async def read_tiff_file(request: Request, dataset_path: str,
    Raises:
       HTTPException: If the TIFF file was not found.
    '''
-   scale = x + "_" + y + "_" + z
-   req_path = dataset_path + "/" + scale + "/" + leaf_path + ".tiff"
-   return tiff_to_byte_stream(req_path)
+   req_path = f"{dataset_path}/{x}_{y}_{z}/{leaf_path}.tiff"
+   return tiff_to_byte_stream(req_path, request)
 
 
 @router.get("/{dataset_path}/{x}_{y}_{z}/{leaf_path}",
@@ -423,15 +742,14 @@ async def read_tiff_file(request: Request, dataset_path: str,
    Raises:
       HTTPException: If the TIFF file was not found.
    '''
-   scale = x + "_" + y + "_" + z
-   req_path = dataset_path + "/" + scale + "/" + leaf_path + ".tiff"
-   return tiff_to_byte_stream(req_path)
+   req_path = f"{dataset_path}/{x}_{y}_{z}/{leaf_path}.tiff"
+   return tiff_to_byte_stream(req_path, request)
 
 
-@router.get("/{dataset_path}/annotations/{block}/{leaf_file}.json",
+@annotation_router.get("/{leaf_file}.json",
             description="Retrieve the contents for the given JSON annotation file.",
             response_description="JSON object containing the annotations.",
-            response_model=list[models.CentroidAnnotation|models.CellAnnotation|models.FiberAnnotation]
+            response_model=list[models.Annotation]
            )
 async def read_json_file(request: Request, dataset_path: str, block: str,
                        leaf_file: str)->Response:
@@ -450,15 +768,30 @@ async def read_json_file(request: Request, dataset_path: str, block: str,
       HTTPException: If the json file was not found.
    '''
    block_path = Tools.translate_block_path( \
-                  "%s/annotations/block_info.csv" % dataset_path,
-                  block)
-   req_path = dataset_path + "/annotations/" + block_path + "/" + \
-             leaf_file + ".json"
-   response = Tools.get_full_file_path(req_path=req_path)
+                  f"{dataset_path}/annotations/block_info.csv", block)
+   req_path = f"{dataset_path}/annotations/{block_path}/{leaf_file}.json"
+   if Config.validate is not None:
+      # Debug mode: parse and validate the stored file against the
+      # annotation schema before serving it, so schema drift is caught
+      # here instead of inside the viewer.  The normal path ships the
+      # file bytes as-is with no per-request parse or revalidation:
+      full_path = _resolve_safe(req_path)
+      exists,is_dir,size,mtime_ns,st = _stat(full_path)
+      if exists:
+         async with aiofiles.open(full_path, 'rb') as f:
+            raw = await f.read()
+         try:
+            models.AnnotationList.validate_json(raw)
+         except Exception as e:
+            logging.error("Annotation validation failed for %s: %s" % \
+                          (req_path,str(e)))
+            raise HTTPException(status_code=500,
+                                detail="%s failed validation" % req_path)
+   response = Tools.get_full_file_path(req_path=req_path, request=request)
    return response
 
 
-@router.put("/{dataset_path}/annotations/{block}/{leaf_file}.json",
+@annotation_router.put("/{leaf_file}.json",
             description="Upload JSON contents to a file, overwriting an existng one.",
             response_description="JSON object containing the written file path.",
             response_model=models.Path
@@ -478,21 +811,21 @@ async def put_json_file(request: Request, dataset_path: str, block: str,
       str: json representing the filename that was written.
    '''
    block_path = Tools.translate_block_path( \
-                  "%s/annotations/block_info.csv" % dataset_path,
-                  block)
-   req_path = dataset_path + "/annotations/" + block_path + "/" + \
-             leaf_file + ".json"
-   full_path = Config.root_path + "/" + req_path
+                  f"{dataset_path}/annotations/block_info.csv", block)
+   req_path = f"{dataset_path}/annotations/{block_path}/{leaf_file}.json"
+   full_path = _resolve_safe(req_path)
    logging.info("Upload file: %s maps to %s" % (req_path,full_path))
    # NG is uploading the file in the body.  The fastapi.Body class doesn't
-   # seem to be compatible with NG, so we'll read the content directly from the
-   # Request:
-   json_payload = b''
-   async for chunk in request.stream():
-      json_payload += chunk
-   with open(full_path, 'wb') as f:
-      f.write(json_payload)
-   return model.Path(filename=req_path)
+   # seem to be compatible with NG, so we'll stream the content directly
+   # from the Request to disk.  This never buffers the full payload in
+   # memory and avoids the O(N^2) cost of bytes concatenation:
+   async with aiofiles.open(full_path, 'wb') as f:
+      async for chunk in request.stream():
+         await f.write(chunk)
+   # The file (possibly) changed, so drop this worker's cached stat
+   # results; other workers pick up the change when their TTL expires:
+   _stat_cache.clear()
+   return models.Path(filename=req_path)
 
 
 @router.get("/{some_path:path}",
@@ -516,30 +849,37 @@ async def read_some_path(request: Request, some_path:str)->Response:
    '''
    url_path = "/" + some_path  # NOTE: Above, the app.get("/....") strips the leading '/'
    logging.debug("Default handler.  Client request path: %s" % url_path)
-   if '..' in url_path:
-      # Directory traversal attack
-      logging.warning("Default Handler:  Directory traversal attack detected.  Raising 404.")
-      raise HTTPException(status_code=404, detail="%s not found" % url_path)
    if url_path.endswith('/'):
       # Client explicitly requests this path as a directory.  Results are
       # relative to the reuqested path:
       html_content = Tools.html_dir_listing(client_url_path=url_path)
       return HTMLResponse(content=html_content, status_code=200)
    else:
-      # full_fs_path is only used to check the type of path (file, dir):
-      full_fs_path = Config.root_path + url_path
+      # full_fs_path is only used to check the type of path (file, dir).
+      # _resolve_safe also rejects directory traversal attacks:
+      full_fs_path = _resolve_safe(url_path)
       logging.debug("Default Handler:  File System request full path: %s" % full_fs_path)
-      if os.path.isdir(full_fs_path):
+      # Anything reachable here may be replaced on disk at any time
+      # (by another worker or outside dataset ingest), so stat the path
+      # directly: the Content-Length header must describe the bytes
+      # that are about to be streamed:
+      try:
+         st = os.stat(full_fs_path)
+      except OSError:
+         st = None
+      if st is not None and stat.S_ISDIR(st.st_mode):
          # This is still a directory request, but we need to include client
          # request path in response:
          html_content = Tools.html_dir_listing(client_url_path=url_path)
          return HTMLResponse(content=html_content, status_code=200)
       else:
-         if not os.path.exists(full_fs_path):
+         if st is None:
             logging.warning("Default Handler: Path not found: %s" % url_path)
             raise HTTPException(status_code=404, detail="%s not found" % \
                                 url_path)
-         response = FileResponse(path=full_fs_path)
+         # Hand the fresh stat result over so FileResponse doesn't
+         # stat the file again before sending it:
+         response = FileResponse(path=full_fs_path, stat_result=st)
          if some_path.endswith("/info"):
             response.headers["content-type"] = "application/octet-stream"
          if some_path.endswith(".txt"):
@@ -547,7 +887,7 @@ async def read_some_path(request: Request, some_path:str)->Response:
          return response
 
 
-@router.delete("/{dataset_path}/annotations/{block}/{leaf_file}.json",
+@annotation_router.delete("/{leaf_file}.json",
                description="Delete the annotation identified by 'id' in the JSON annotation file.",
                response_description="The 'id' of the deleted annotation.",
                response_model=models.AnnotationId
@@ -578,36 +918,39 @@ async def delete_annotation(request: Request, dataset_path: str, block: str,
    # Construct the local/full path from the request:
    # Translate block path:
    block_path = Tools.translate_block_path( \
-                  "%s/annotations/block_info.csv" % dataset_path,
-                  block)
-   req_path = dataset_path + "/annotations/" + block_path + "/" + \
-             leaf_file + ".json"
-   full_path = Config.root_path + "/" + req_path
+                  f"{dataset_path}/annotations/block_info.csv", block)
+   req_path = f"{dataset_path}/annotations/{block_path}/{leaf_file}.json"
+   full_path = _resolve_safe(req_path)
    logging.debug("Delete Annotation: Path %s maps to %s" % (req_path,full_path))
    logging.debug("Delete Annotation: Id to delete: %s" % str(id))
    if not os.path.exists(full_path):
       logging.warning("Delete Annotation: Path not found: %s.json" % leaf_file)
       raise HTTPException(status_code=404, detail="%s.json not found" % \
                           leaf_file)
+   # Read and write through aiofiles so a large annotation file doesn't
+   # block the event loop (and all other requests) during disk I/O:
    data = None
    res = []
-   with open(full_path, 'r') as f:
-      data = json.load(f)
+   async with aiofiles.open(full_path, 'rb') as f:
+      data = orjson.loads(await f.read())
    if data is not None:
-       # Loop through dictionaries, adding ones that don't match 'id':
-      for item in data:
-         if item['id'] != id:
-            res.append(item)
-         else:
-            logging.debug("Delete Annotation: Deleted item: %s" % id)
-   jres = json.dumps(res, indent=3)
-   with open(full_path, 'wb') as f:
-      f.write(jres)
+      # Index the annotations by 'id' so the removal is a single dict
+      # lookup.  Dict insertion order preserves the file order:
+      indexed = {item['id']: item for item in data}
+      if indexed.pop(id, None) is not None:
+         logging.debug("Delete Annotation: Deleted item: %s" % id)
+      res = list(indexed.values())
+   jres = orjson.dumps(res, option=orjson.OPT_INDENT_2)
+   async with aiofiles.open(full_path, 'wb') as f:
+      await f.write(jres)
+   # The file changed, so drop this worker's cached stat results; other
+   # workers pick up the change when their TTL expires:
+   _stat_cache.clear()
    response.status_code = 200
    return id
 
 
-@router.patch("/{dataset_path}/annotations/{block}/{leaf_file}.json",
+@annotation_router.patch("/{leaf_file}.json",
               description="Update an annotation in the specified JSON annotation file.",
               response_description="The 'id' of the updated annotation.",
               response_model=models.AnnotationId
@@ -631,52 +974,60 @@ async def update_annotation(request: Request, dataset_path: str, block: str,
    '''
    response = Response()
    block_path = Tools.translate_block_path( \
-                  "%s/annotations/block_info.csv" % dataset_path,
-                  block)
-   req_path = dataset_path + "/annotations/" + block_path + "/" + \
-             leaf_file + ".json"
-   full_path = Config.root_path + "/" + req_path
+                  f"{dataset_path}/annotations/block_info.csv", block)
+   req_path = f"{dataset_path}/annotations/{block_path}/{leaf_file}.json"
+   full_path = _resolve_safe(req_path)
    logging.info("Patch Annotation: Path %s maps to %s" % (req_path,full_path))
    if not os.path.exists(full_path):
       logging.warning("Patch Annotation: Path does not exist: %s.json" % leaf_file)
       raise HTTPException(status_code=404, detail="%s.json not found" % \
                           leaf_file)
-   # Load the json payload:
-   json_payload = b''
+   # Load the json payload.  A bytearray appends in amortized O(1),
+   # unlike bytes concatenation which recopies the payload per chunk:
+   json_payload = bytearray()
    async for chunk in request.stream():
-      json_payload += chunk
+      json_payload.extend(chunk)
    # Convert the json payload into python structure:
-   json_data = json.loads(json_payload)
+   json_data = orjson.loads(json_payload)
    json_id = json_data["id"]
+   # Read and write through aiofiles so a large annotation file doesn't
+   # block the event loop (and all other requests) during disk I/O:
    file_data = None
-   res = []
-   with open(full_path, 'r') as f:
-      file_data = json.load(f)
-   replaced = False
+   async with aiofiles.open(full_path, 'rb') as f:
+      file_data = orjson.loads(await f.read())
+   # Index the annotations by 'id' so the replacement is a single dict
+   # store.  Dict insertion order preserves the file order, with a new
+   # annotation appended at the end:
+   indexed = {}
    if file_data is not None:
-       # Loop through dictionaries, adding ones that don't match 'id':
-      for item in file_data:
-         if item['id'] == json_id:
-            logging.debug("Patch Annotation: Replacing item: %s" % json_id)
-            res.append(json_data)
-            replaced = True
-         else:
-            res.append(item)
-   if not replaced:
+      indexed = {item['id']: item for item in file_data}
+   if json_id in indexed:
+      logging.debug("Patch Annotation: Replacing item: %s" % json_id)
+   else:
       logging.info("Patch Annotation: Item not replaced but added: %s" % json_id)
-      res.append(json_data)
-   jres = json.dumps(res, indent=3)
-   with open(full_path, 'wb') as f:
-      f.write(jres)
+   indexed[json_id] = json_data
+   res = list(indexed.values())
+   jres = orjson.dumps(res, option=orjson.OPT_INDENT_2)
+   async with aiofiles.open(full_path, 'wb') as f:
+      await f.write(jres)
+   # The file changed, so drop this worker's cached stat results; other
+   # workers pick up the change when their TTL expires:
+   _stat_cache.clear()
    response.status_code = 200
-   return id
+   # The updated annotation's id comes from the payload; the 'id' query
+   # parameter is optional and may be absent:
+   return json_id
 
 
 # Initialize the main application.
 #
 app = FastAPI(
-         docs_url="/api/"
+         docs_url="/api/",
+         default_response_class=ORJSONResponse
       )
+# The annotation routes go first so their shared prefix is tried before
+# the catch-all path route:
+app.include_router(annotation_router)
 app.include_router(router)
 app.add_middleware(
     CORSMiddleware,